@@ -0,0 +1,52 @@
+"""
+Benchmark for the bracket engine.
+Plays every format to the end with random results.
+
+Usage: python bench_bracket.py [teams] [repeats]
+"""
+import random
+import sys
+import time
+
+from bracket import FORMATS, create_bracket
+
+
+def play(fmt, team_count, rng):
+    """Build a bracket and record random results until it finishes."""
+    start = time.perf_counter()
+    bracket = create_bracket(fmt, team_count)
+    built = time.perf_counter()
+
+    results = 0
+    ready = bracket.ready_matches()
+    while ready:
+        match = ready.pop()
+        team = rng.choice(bracket.teams(match))
+        ready.extend(bracket.record(match, team))
+        results += 1
+    done = time.perf_counter()
+
+    assert bracket.finished, f"{fmt} bracket did not finish"
+    return built - start, done - built, results
+
+
+def main():
+    team_count = int(sys.argv[1]) if len(sys.argv) > 1 else 1000
+    repeats = int(sys.argv[2]) if len(sys.argv) > 2 else 5
+    rng = random.Random(0)
+
+    print(f"Bracket benchmark: {team_count} teams, best of {repeats}")
+    for fmt in FORMATS:
+        runs = [play(fmt, team_count, rng) for _ in range(repeats)]
+        build = min(run[0] for run in runs)
+        play_time = min(run[1] for run in runs)
+        results = runs[0][2]
+        per_result = play_time / results * 1e6
+        print(
+            f"{fmt:>7}: build {build * 1e3:7.2f} ms | "
+            f"{results:5d} results in {play_time * 1e3:7.2f} ms ({per_result:.2f} us/result)"
+        )
+
+
+if __name__ == "__main__":
+    main()
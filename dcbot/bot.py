@@ -1,13 +1,20 @@
 import discord
 from discord.ext import commands, tasks
+import io
 import os
+import secrets
 from dotenv import load_dotenv
 import asyncio
 from datetime import datetime, timedelta
+from bracket import create_bracket
+from checkin import make_payload, payload_team_number, render_codes, verify_payload
 
 # Load environment variables
 load_dotenv()
 
+# Key for signing team check-in QR codes (random per run if not configured)
+CHECKIN_SECRET = (os.getenv('CHECKIN_SECRET') or secrets.token_hex(32)).encode()
+
 # Bot setup
 intents = discord.Intents.default()
 intents.message_content = True
@@ -26,11 +33,19 @@ USERS_PER_TEAM = 4
 registered_role = None  # Common role for all registered users
 group_roles = []  # List of roles for each group (Grp1, Grp2, etc.)
 group_channels = []
+group_members = []  # Set of user IDs currently holding each group role
+
+# Bracket state (created by !bracket, advanced by !result)
+active_bracket = None
+match_groups = {}  # Match ID -> index into group_roles/group_channels
+free_groups = []  # Indices of group roles/channels not hosting a match
+bracket_lock = asyncio.Lock()  # Serializes group assignment so concurrent commands can't claim the same slot
 
 # Registration status
 registration_active = False
 registration_channel = None
 registration_start_time = None  # When registration started (for 8-hour timer)
+checked_in_teams = set()  # Team numbers (1-based) that scanned their check-in code
 
 # Scheduled registration time (24-hour format: HH:MM)
 scheduled_registration_time = None  # Format: (hour, minute) e.g., (14, 30) for 2:30 PM
@@ -194,6 +209,7 @@ async def auto_start_registration(channel):
     registration_active = True
     registration_channel = channel
     registered_teams = []  # Clear previous registrations
+    checked_in_teams.clear()
     registration_start_time = datetime.now()  # Set start time for 8-hour timer
     
     # Create or get the common "Registered" role
@@ -266,6 +282,7 @@ async def start_registration(ctx):
     registration_active = True
     registration_channel = ctx.channel
     registered_teams = []  # Clear previous registrations
+    checked_in_teams.clear()
     registration_start_time = datetime.now()  # Set start time for 8-hour timer
     
     # Create or get the common "Registered" role
@@ -425,13 +442,65 @@ async def on_message(message):
     await bot.process_commands(message)
 
 
+async def get_group_category(guild):
+    """Find or create the category that holds the group channels"""
+    category_name = "Tournament Groups"
+    category = discord.utils.get(guild.categories, name=category_name)
+    
+    if not category:
+        category = await guild.create_category(
+            category_name,
+            reason="Category for tournament group channels"
+        )
+    return category
+
+async def create_group_channel(guild, category, idx, group_role):
+    """Create the private group-{idx} channel visible to the group role and admins"""
+    channel_name = f"group-{idx}"
+    overwrites = {
+        guild.default_role: discord.PermissionOverwrite(view_channel=False),
+        group_role: discord.PermissionOverwrite(view_channel=True, send_messages=True, read_message_history=True),
+        guild.me: discord.PermissionOverwrite(view_channel=True, send_messages=True, manage_messages=True)
+    }
+    
+    # Add admin permissions
+    for role in guild.roles:
+        if role.permissions.administrator:
+            overwrites[role] = discord.PermissionOverwrite(view_channel=True, send_messages=True, manage_messages=True)
+    
+    return await category.create_text_channel(
+        channel_name,
+        overwrites=overwrites,
+        reason=f"Private channel for Group {idx}"
+    )
+
+async def send_unpaired_checkin(ctx, team_number, team_data, code):
+    """DM an unpaired team's check-in code to its members, falling back to the command channel"""
+    filename = f"team-{team_number}-checkin.png"
+    message = (
+        f"📷 Check-in code for **{team_data['name']}** (Team #{team_number}). "
+        f"Scan it and send `!checkin <scanned text>` in the server."
+    )
+    delivered = 0
+    for user in team_data["members"]:
+        try:
+            await user.send(message, file=discord.File(io.BytesIO(code), filename=filename))
+            delivered += 1
+        except (discord.Forbidden, discord.HTTPException):
+            pass
+    if delivered == 0:
+        # Only this team's members can use the code, so posting it here is safe
+        await ctx.send(message, file=discord.File(io.BytesIO(code), filename=filename))
+    else:
+        await ctx.send(f"📨 Sent **{team_data['name']}**'s check-in code to {delivered} member(s) by DM (team is unpaired).")
+
 @bot.command(name='pair')
 async def pair(ctx):
     """
     Pair teams together (Team 1 & 2 = Group 1, Team 3 & 4 = Group 2, etc.)
     Creates a role for each group (Grp1, Grp2, etc.) and private channels for each group.
     """
-    global group_roles, group_channels
+    global group_roles, group_channels, group_members, active_bracket, match_groups, free_groups
     
     # Check if user has admin permissions
     if not ctx.author.guild_permissions.administrator:
@@ -459,6 +528,12 @@ async def pair(ctx):
     
     guild = ctx.guild
     
+    # Render every team's check-in code in worker processes while roles are set up
+    checkin_task = asyncio.ensure_future(render_codes([
+        make_payload(CHECKIN_SECRET, team_number, team_data["name"])
+        for team_number, team_data in enumerate(registered_teams, 1)
+    ]))
+    
     # Pair teams: Team 1 & 2 = Group 1, Team 3 & 4 = Group 2, etc.
     groups = []
     for i in range(0, len(registered_teams), 2):
@@ -471,6 +546,12 @@ async def pair(ctx):
             # Odd number of teams - last team is unpaired
             groups.append((registered_teams[i], None))
     
+    # Stop the bracket first so no match is opened while the groups are torn down
+    async with bracket_lock:
+        active_bracket = None
+        match_groups = {}
+        free_groups = []
+    
     # Clear existing roles and channels if re-pairing
     if group_roles:
         for role in group_roles:
@@ -492,6 +573,8 @@ async def pair(ctx):
                 pass
         group_channels = []
     
+    group_members = []
+    
     # Create role for each group and assign to users
     try:
         for idx, (team1_data, team2_data) in enumerate(groups, 1):
@@ -516,6 +599,7 @@ async def pair(ctx):
                     )
                 
                 group_roles.append(group_role)
+                group_members.append({user.id for user in group_users})
                 
                 # Assign role to all users in this group
                 added_count = 0
@@ -528,24 +612,25 @@ async def pair(ctx):
                 if added_count > 0:
                     await ctx.send(f"✅ Created role {group_role.mention} and assigned to {added_count} user(s) in Group {idx}.")
     except discord.Forbidden:
+        checkin_task.cancel()
         await ctx.send("❌ Bot doesn't have permission to create/assign roles. Please grant 'Manage Roles' permission.")
         return
     except Exception as e:
+        checkin_task.cancel()
         await ctx.send(f"❌ Error creating/assigning roles: {str(e)}")
         return
     
+    try:
+        checkin_codes = await checkin_task
+    except Exception as e:
+        checkin_codes = None
+        await ctx.send(f"⚠️ Could not create check-in QR codes: {str(e)}")
+    
     # Create private channels for each group
     category = None
     try:
         # Try to find or create a category for tournament channels
-        category_name = "Tournament Groups"
-        category = discord.utils.get(guild.categories, name=category_name)
-        
-        if not category:
-            category = await guild.create_category(
-                category_name,
-                reason="Category for tournament group channels"
-            )
+        category = await get_group_category(guild)
         
         # Create channels for each group
         created_channels = []
@@ -561,23 +646,7 @@ async def pair(ctx):
                 group_role = group_roles[idx - 1]  # idx is 1-based, list is 0-based
                 
                 # Create channel
-                channel_name = f"group-{idx}"
-                overwrites = {
-                    guild.default_role: discord.PermissionOverwrite(view_channel=False),
-                    group_role: discord.PermissionOverwrite(view_channel=True, send_messages=True, read_message_history=True),
-                    guild.me: discord.PermissionOverwrite(view_channel=True, send_messages=True, manage_messages=True)
-                }
-                
-                # Add admin permissions
-                for role in guild.roles:
-                    if role.permissions.administrator:
-                        overwrites[role] = discord.PermissionOverwrite(view_channel=True, send_messages=True, manage_messages=True)
-                
-                channel = await category.create_text_channel(
-                    channel_name,
-                    overwrites=overwrites,
-                    reason=f"Private channel for Group {idx}"
-                )
+                channel = await create_group_channel(guild, category, idx, group_role)
                 group_channels.append(channel)
                 created_channels.append((idx, channel, group_users, group_role, team1_name, team2_name))
                 
@@ -603,7 +672,23 @@ async def pair(ctx):
                     value=f"All members have been assigned the {group_role.mention} role.",
                     inline=False
                 )
-                await channel.send(embed=welcome_embed)
+                
+                # Attach each team's check-in code (team numbers are 2 * idx - 1 and 2 * idx)
+                files = []
+                if checkin_codes:
+                    for team_number in (2 * idx - 1, 2 * idx):
+                        files.append(discord.File(io.BytesIO(checkin_codes[team_number - 1]), filename=f"team-{team_number}-checkin.png"))
+                    welcome_embed.add_field(
+                        name="Check-in",
+                        value="Scan your team's QR code below and send `!checkin <scanned text>`.",
+                        inline=False
+                    )
+                await channel.send(embed=welcome_embed, files=files)
+        
+        # The unpaired team has no group channel, so its code goes out by DM
+        unpaired_team, partner = groups[-1]
+        if partner is None and checkin_codes:
+            await send_unpaired_checkin(ctx, len(registered_teams), unpaired_team, checkin_codes[-1])
         
         # Create summary embed
         embed = discord.Embed(
@@ -632,6 +717,281 @@ async def pair(ctx):
         await ctx.send(f"❌ Error creating channels: {str(e)}")
         return
 
+async def move_group_members(guild, slot, new_ids, match):
+    """Give a group's role to `new_ids`, only touching members whose group changed"""
+    group_role = group_roles[slot]
+    old_ids = group_members[slot]
+    for user_id in old_ids - new_ids:
+        member = guild.get_member(user_id)
+        if member and group_role in member.roles:
+            await member.remove_roles(group_role, reason=f"Bracket match {match + 1} moved into this group")
+        old_ids.discard(user_id)
+    for user_id in new_ids - old_ids:
+        member = guild.get_member(user_id)
+        if member and group_role not in member.roles:
+            await member.add_roles(group_role, reason=f"Assigned to bracket match {match + 1}")
+        old_ids.add(user_id)
+
+async def open_ready_matches(guild):
+    """
+    Open every ready bracket match that has no group yet.
+    This also retries matches that failed to open earlier. Returns [(match, channel), ...].
+    """
+    opened = []
+    async with bracket_lock:
+        if active_bracket is None:
+            return opened
+        for match in active_bracket.ready_matches():
+            # Opening a match awaits, so re-check that it still needs a group
+            if match not in match_groups and active_bracket.is_ready(match):
+                channel = await open_match(guild, match)
+                opened.append((match, channel))
+    return opened
+
+async def create_group(guild):
+    """
+    Add a group role and channel for bracket matches and return its slot.
+    A role left without a channel (e.g. by a failed !pair) is reused.
+    """
+    slot = min(len(group_roles), len(group_channels))
+    idx = slot + 1
+    if slot < len(group_roles):
+        group_role = group_roles[slot]
+    else:
+        role_name = f"Grp{idx}"
+        group_role = discord.utils.get(guild.roles, name=role_name)
+        if not group_role:
+            group_role = await guild.create_role(
+                name=role_name,
+                color=discord.Color.blue(),
+                mentionable=True,
+                reason=f"Role for Group {idx} participants"
+            )
+        group_roles.append(group_role)
+        group_members.append(set())
+    category = await get_group_category(guild)
+    channel = await create_group_channel(guild, category, idx, group_role)
+    group_channels.append(channel)
+    return slot
+
+async def open_match(guild, match):
+    """
+    Give a ready bracket match a group role and channel (call with bracket_lock held).
+    A free group from an earlier match is reused and only the members that
+    changed get their role updated; new groups are created only when none are free.
+    """
+    team_a, team_b = active_bracket.teams(match)
+    team1_data = registered_teams[team_a]
+    team2_data = registered_teams[team_b]
+    group_users = team1_data["members"] + team2_data["members"]
+    new_ids = {user.id for user in group_users}
+    
+    slot = free_groups.pop(0) if free_groups else await create_group(guild)
+    try:
+        group_role = group_roles[slot]
+        channel = group_channels[slot]
+        await move_group_members(guild, slot, new_ids, match)
+    except Exception:
+        # Give the group back so the match can be reopened later
+        free_groups.insert(0, slot)
+        raise
+    
+    match_groups[match] = slot
+    
+    match_embed = discord.Embed(
+        title=f"⚔️ Match {match + 1} - {active_bracket.round_label(match)}",
+        description=f"This channel now hosts match {match + 1}.",
+        color=discord.Color.green()
+    )
+    match_embed.add_field(
+        name="Teams",
+        value=f"**#{team_a + 1} {team1_data['name']}**\n{', '.join([user.mention for user in team1_data['members']])}\n\n"
+              f"**#{team_b + 1} {team2_data['name']}**\n{', '.join([user.mention for user in team2_data['members']])}",
+        inline=False
+    )
+    match_embed.add_field(
+        name="Result",
+        value=f"An admin records the winner with `!result {match + 1} <team number>`.",
+        inline=False
+    )
+    await channel.send(embed=match_embed)
+    return channel
+
+@bot.command(name='bracket')
+async def bracket(ctx, fmt: str = "single"):
+    """
+    Start a bracket over the registered teams (Admin only).
+    Usage: !bracket [single|double|swiss]
+    Reuses the group roles and channels created by !pair.
+    """
+    global active_bracket, match_groups, free_groups
+    
+    # Check if user has admin permissions
+    if not ctx.author.guild_permissions.administrator:
+        await ctx.send("❌ You need administrator permissions to use this command.")
+        return
+    
+    if len(registered_teams) < 2:
+        await ctx.send("❌ Need at least 2 teams to start a bracket.")
+        return
+    
+    try:
+        new_bracket = create_bracket(fmt.lower(), len(registered_teams))
+    except ValueError as e:
+        await ctx.send(f"❌ {str(e)}")
+        return
+    
+    async with bracket_lock:
+        active_bracket = new_bracket
+        match_groups = {}
+        # Only groups that got both a role and a channel can host a match
+        free_groups = list(range(min(len(group_roles), len(group_channels))))
+    
+    try:
+        opened = await open_ready_matches(ctx.guild)
+    except discord.Forbidden:
+        await ctx.send("❌ Bot doesn't have permission to manage roles or channels. Please grant 'Manage Roles' and 'Manage Channels' permissions.")
+        return
+    except Exception as e:
+        await ctx.send(f"❌ Error setting up bracket matches: {str(e)}\nRun `!matches` to retry opening them.")
+        return
+    
+    match_text = ""
+    for match, channel in opened:
+        team_a, team_b = new_bracket.teams(match)
+        match_text += f"**Match {match + 1}:** #{team_a + 1} vs #{team_b + 1} in {channel.mention}\n"
+    
+    embed = discord.Embed(
+        title=f"🏆 {fmt.capitalize()} Bracket Started!",
+        description=f"Total Teams: {len(registered_teams)} | Open Matches: {len(opened)}",
+        color=discord.Color.green()
+    )
+    embed.add_field(name="Open Matches", value=match_text[:1024] or "None", inline=False)
+    embed.set_footer(text="Record results with !result <match> <team number>")
+    
+    await ctx.send(embed=embed)
+
+@bot.command(name='result')
+async def result(ctx, match_number: int, team_number: int):
+    """
+    Record the winner of a bracket match (Admin only).
+    Usage: !result <match> <team number>
+    """
+    # Check if user has admin permissions
+    if not ctx.author.guild_permissions.administrator:
+        await ctx.send("❌ You need administrator permissions to use this command.")
+        return
+    
+    match = match_number - 1
+    async with bracket_lock:
+        current_bracket = active_bracket
+        if current_bracket is None:
+            await ctx.send("❌ No bracket is running. Start one with `!bracket`.")
+            return
+        try:
+            current_bracket.record(match, team_number - 1)
+        except ValueError as e:
+            await ctx.send(f"❌ {str(e)}")
+            return
+        
+        # The finished match's group is free for the next match
+        slot = match_groups.pop(match, None)
+        if slot is not None:
+            free_groups.append(slot)
+    
+    winner_name = registered_teams[team_number - 1]["name"]
+    await ctx.send(f"✅ **{winner_name}** won match {match_number}.")
+    
+    try:
+        for new_match, channel in await open_ready_matches(ctx.guild):
+            team_a, team_b = current_bracket.teams(new_match)
+            await ctx.send(f"⚔️ Match {new_match + 1} ({current_bracket.round_label(new_match)}): #{team_a + 1} vs #{team_b + 1} in {channel.mention}")
+    except discord.Forbidden:
+        await ctx.send("❌ Bot doesn't have permission to manage roles or channels. Please grant 'Manage Roles' and 'Manage Channels' permissions.")
+        return
+    except Exception as e:
+        await ctx.send(f"❌ Error opening next matches: {str(e)}\nRun `!matches` to retry opening them.")
+        return
+    
+    if current_bracket.finished:
+        champion = registered_teams[current_bracket.champion]
+        embed = discord.Embed(
+            title="🏆 Tournament Finished!",
+            description=f"**{champion['name']}** is the champion!",
+            color=discord.Color.gold()
+        )
+        embed.add_field(name="Members", value=", ".join([user.mention for user in champion["members"]]), inline=False)
+        await ctx.send(embed=embed)
+
+@bot.command(name='matches')
+async def matches(ctx):
+    """
+    List the bracket matches that are waiting for a result.
+    For admins this also opens any ready match that has no channel yet.
+    """
+    if active_bracket is None:
+        await ctx.send("📋 No bracket is running.")
+        return
+    
+    if ctx.author.guild_permissions.administrator:
+        try:
+            await open_ready_matches(ctx.guild)
+        except discord.Forbidden:
+            await ctx.send("❌ Bot doesn't have permission to manage roles or channels. Please grant 'Manage Roles' and 'Manage Channels' permissions.")
+        except Exception as e:
+            await ctx.send(f"❌ Error opening matches: {str(e)}")
+        if active_bracket is None:
+            await ctx.send("📋 No bracket is running.")
+            return
+    
+    match_text = ""
+    for match in active_bracket.ready_matches():
+        team_a, team_b = active_bracket.teams(match)
+        slot = match_groups.get(match)
+        location = f" in {group_channels[slot].mention}" if slot is not None else ""
+        match_text += (
+            f"**Match {match + 1}** ({active_bracket.round_label(match)}): "
+            f"{registered_teams[team_a]['name']} vs {registered_teams[team_b]['name']}{location}\n"
+        )
+    
+    embed = discord.Embed(
+        title="⚔️ Open Matches",
+        description=match_text[:4096] or "No matches waiting for a result.",
+        color=discord.Color.blue()
+    )
+    await ctx.send(embed=embed)
+
+@bot.command(name='checkin')
+async def checkin(ctx, *, payload: str):
+    """
+    Check a team in with the text scanned from its QR code.
+    Usage: !checkin <scanned text>
+    """
+    team_number = payload_team_number(payload)
+    if team_number is None or not 1 <= team_number <= len(registered_teams):
+        await ctx.send("❌ Invalid check-in code.")
+        return
+    
+    team_data = registered_teams[team_number - 1]
+    if not verify_payload(CHECKIN_SECRET, payload, team_number, team_data["name"]):
+        await ctx.send("❌ Invalid check-in code.")
+        return
+    
+    member_ids = {user.id for user in team_data["members"]}
+    if ctx.author.id not in member_ids and not ctx.author.guild_permissions.administrator:
+        await ctx.send("❌ This check-in code belongs to another team.")
+        return
+    
+    if team_number in checked_in_teams:
+        await ctx.send(f"⚠️ **{team_data['name']}** is already checked in.")
+        return
+    
+    checked_in_teams.add(team_number)
+    await ctx.send(
+        f"✅ **{team_data['name']}** checked in! "
+        f"({len(checked_in_teams)}/{len(registered_teams)} teams)"
+    )
+
 @bot.command(name='list')
 async def list_registered(ctx):
     """
@@ -668,7 +1028,14 @@ async def clear_registrations(ctx):
         await ctx.send("❌ You need administrator permissions to use this command.")
         return
     
-    global registered_teams, group_roles, group_channels, registered_role, registration_active
+    global registered_teams, group_roles, group_channels, group_members, registered_role, registration_active
+    global active_bracket, match_groups, free_groups
+    
+    # Stop the bracket first so no match is opened while the groups are torn down
+    async with bracket_lock:
+        active_bracket = None
+        match_groups = {}
+        free_groups = []
     
     team_count = len(registered_teams)
     user_count = sum(len(team_data["members"]) for team_data in registered_teams)
@@ -709,6 +1076,8 @@ async def clear_registrations(ctx):
     registered_teams = []
     group_channels = []
     group_roles = []
+    group_members = []
+    checked_in_teams.clear()
     registration_active = False
     
     await ctx.send(
@@ -789,6 +1158,10 @@ async def help_bot(ctx):
         ("`Team Name @user1 @user2 @user3 @user4`", "Register a team (no prefix needed, just type team name and mention 4 members)"),
         ("`!list`", "List all registered teams and users"),
         ("`!pair`", "Pair teams together and create private channels (Admin only, requires 2+ teams)"),
+        ("`!bracket [single|double|swiss]`", "Start a bracket reusing the group channels (Admin only)"),
+        ("`!result <match> <team number>`", "Record a match winner and open the next matches (Admin only)"),
+        ("`!matches`", "List bracket matches waiting for a result (admins: also opens any match missing a channel)"),
+        ("`!checkin <scanned text>`", "Check your team in with the text from its QR code"),
         ("`!status`", "Check registration status and scheduled time"),
         ("`!clear`", "Clear all team registrations, roles, and channels (Admin only)"),
         ("`!help_bot`", "Show this help message")
@@ -0,0 +1,278 @@
+"""
+Tournament bracket engine used by the bot after teams have been paired.
+
+Teams are referred to by their 0-based registration index. Every bracket
+keeps its matches in flat lists indexed by match id, so recording a result
+only touches the finished match and the matches its winner and loser move
+into. Formats: single elimination, double elimination and Swiss.
+"""
+
+EMPTY = -1  # Slot whose team is not decided yet
+BYE = -2  # Slot that will never get a team
+
+FORMATS = ("single", "double", "swiss")
+
+
+class Bracket:
+    """Match storage shared by all bracket formats."""
+
+    def __init__(self, team_count):
+        if team_count < 2:
+            raise ValueError("A bracket needs at least 2 teams")
+        self.team_count = team_count
+        self.slot_a = []
+        self.slot_b = []
+        self.winner = []
+        self.round_of = []  # Round number of each match (1-based)
+        self.side = []  # "W" winners, "L" losers, "F" grand final, "S" Swiss
+        self.champion = None
+        self._ready = {}  # Matches waiting for a result, kept in insertion order
+
+    def _add_match(self, round_number, side, a=EMPTY, b=EMPTY):
+        self.slot_a.append(a)
+        self.slot_b.append(b)
+        self.winner.append(EMPTY)
+        self.round_of.append(round_number)
+        self.side.append(side)
+        return len(self.slot_a) - 1
+
+    @property
+    def finished(self):
+        return self.champion is not None
+
+    def ready_matches(self):
+        """Return the ids of matches that have both teams and no result yet."""
+        return list(self._ready)
+
+    def is_ready(self, match):
+        """Return whether a match has both teams and no result yet."""
+        return match in self._ready
+
+    def teams(self, match):
+        """Return the two team indices playing in a match."""
+        return self.slot_a[match], self.slot_b[match]
+
+    def round_label(self, match):
+        """Return a human readable name for the round a match belongs to."""
+        side = self.side[match]
+        if side == "F":
+            return "Grand Final"
+        if side == "L":
+            return f"Losers Round {self.round_of[match]}"
+        return f"Round {self.round_of[match]}"
+
+    def _check_result(self, match, team):
+        if match < 0 or match >= len(self.winner) or match not in self._ready:
+            raise ValueError(f"Match {match + 1} is not waiting for a result")
+        if team not in (self.slot_a[match], self.slot_b[match]):
+            raise ValueError(f"Team {team + 1} is not playing in match {match + 1}")
+
+    def record(self, match, team):
+        """
+        Record that `team` won `match`.
+        Returns the ids of matches that became ready because of this result.
+        """
+        raise NotImplementedError
+
+
+class EliminationBracket(Bracket):
+    """
+    Single or double elimination bracket.
+
+    Each match stores where its winner and loser move to, encoded as
+    `match * 2 + slot` (slot 0 = team A, 1 = team B) or -1 when the team
+    leaves the bracket. Byes are resolved as soon as they are placed.
+    Double elimination ends with a single grand final (no bracket reset).
+    """
+
+    def __init__(self, team_count, double=False):
+        super().__init__(team_count)
+        self.double = double
+        self.win_to = []
+        self.lose_to = []
+        self._build()
+        self._seed()
+
+    def _add_match(self, round_number, side, a=EMPTY, b=EMPTY):
+        self.win_to.append(-1)
+        self.lose_to.append(-1)
+        return super()._add_match(round_number, side, a, b)
+
+    def _build(self):
+        size = 1
+        while size < self.team_count:
+            size *= 2
+        self.size = size
+
+        # Winners bracket: round r has size >> r matches, match j feeds j // 2
+        winners_rounds = []
+        count = size // 2
+        round_number = 1
+        while count >= 1:
+            matches = [self._add_match(round_number, "W") for _ in range(count)]
+            if winners_rounds:
+                for j, match in enumerate(winners_rounds[-1]):
+                    self.win_to[match] = matches[j // 2] * 2 + j % 2
+            winners_rounds.append(matches)
+            count //= 2
+            round_number += 1
+        self.first_round = winners_rounds[0]
+
+        if not self.double:
+            return
+
+        # Losers bracket: a round of first-round losers, then alternating
+        # drop-in rounds (survivors vs. new losers) and halving rounds
+        losers_final = None
+        if len(winners_rounds) > 1:
+            first = winners_rounds[0]
+            previous = [self._add_match(1, "L") for _ in range(len(first) // 2)]
+            for j, match in enumerate(first):
+                self.lose_to[match] = previous[j // 2] * 2 + j % 2
+            round_number = 2
+            for wb_round in winners_rounds[1:]:
+                drop_in = [self._add_match(round_number, "L") for _ in range(len(wb_round))]
+                for j, match in enumerate(previous):
+                    self.win_to[match] = drop_in[j] * 2
+                # Reverse the order new losers drop in to delay rematches
+                for j, match in enumerate(wb_round):
+                    self.lose_to[match] = drop_in[len(wb_round) - 1 - j] * 2 + 1
+                round_number += 1
+                previous = drop_in
+                if len(drop_in) > 1:
+                    halving = [self._add_match(round_number, "L") for _ in range(len(drop_in) // 2)]
+                    for j, match in enumerate(drop_in):
+                        self.win_to[match] = halving[j // 2] * 2 + j % 2
+                    round_number += 1
+                    previous = halving
+            losers_final = previous[0]
+
+        winners_final = winners_rounds[-1][0]
+        grand_final = self._add_match(1, "F")
+        self.win_to[winners_final] = grand_final * 2
+        if losers_final is None:
+            self.lose_to[winners_final] = grand_final * 2 + 1
+        else:
+            self.win_to[losers_final] = grand_final * 2 + 1
+
+    def _seed(self):
+        # Standard seeding: seed s meets seed n - 1 - s, byes go to top seeds
+        order = [0]
+        while len(order) < self.size:
+            n = len(order) * 2
+            order = [seed for s in order for seed in (s, n - 1 - s)]
+        touched = []
+        for position, seed in enumerate(order):
+            match = self.first_round[position // 2]
+            team = seed if seed < self.team_count else BYE
+            self._place(match * 2 + position % 2, team, touched)
+
+    def _place(self, destination, team, touched):
+        if destination < 0:
+            return
+        match, slot = divmod(destination, 2)
+        if slot == 0:
+            self.slot_a[match] = team
+        else:
+            self.slot_b[match] = team
+        a, b = self.slot_a[match], self.slot_b[match]
+        if a == EMPTY or b == EMPTY:
+            return
+        if a == BYE or b == BYE:
+            # Team advances without playing (or a bye advances if both are byes)
+            self._resolve(match, b if a == BYE else a, touched)
+        else:
+            self._ready[match] = None
+            touched.append(match)
+
+    def _resolve(self, match, team, touched):
+        a, b = self.slot_a[match], self.slot_b[match]
+        loser = b if team == a else a
+        self.winner[match] = team
+        self._ready.pop(match, None)
+        if self.win_to[match] < 0 and team >= 0:
+            self.champion = team
+        self._place(self.win_to[match], team, touched)
+        self._place(self.lose_to[match], loser, touched)
+
+    def record(self, match, team):
+        self._check_result(match, team)
+        touched = []
+        self._resolve(match, team, touched)
+        return touched
+
+
+class SwissBracket(Bracket):
+    """
+    Swiss format: every round pairs teams with equal scores that have not
+    met yet. The next round is only paired once every result of the current
+    round is in; recording any other result just updates the score arrays.
+    """
+
+    def __init__(self, team_count, rounds=None):
+        super().__init__(team_count)
+        self.rounds = rounds or max(1, (team_count - 1).bit_length())
+        self.scores = [0] * team_count
+        self.played = [set() for _ in range(team_count)]
+        self.had_bye = [False] * team_count
+        self.current_round = 0
+        self._pending = 0
+        self._pair_round([])
+
+    def _pair_round(self, touched):
+        self.current_round += 1
+        ranking = sorted(range(self.team_count), key=lambda t: (-self.scores[t], t))
+
+        if len(ranking) % 2:
+            # Lowest ranked team that has not had a bye yet sits this round out
+            bye_team = next((t for t in reversed(ranking) if not self.had_bye[t]), ranking[-1])
+            ranking.remove(bye_team)
+            self.had_bye[bye_team] = True
+            self.scores[bye_team] += 1
+            match = self._add_match(self.current_round, "S", bye_team, BYE)
+            self.winner[match] = bye_team
+
+        # Pool is reversed so the best ranked team is popped from the end
+        pool = ranking[::-1]
+        while pool:
+            team = pool.pop()
+            played = self.played[team]
+            index = len(pool) - 1
+            while index > 0 and pool[index] in played:
+                index -= 1
+            opponent = pool.pop(index)
+            played.add(opponent)
+            self.played[opponent].add(team)
+            match = self._add_match(self.current_round, "S", team, opponent)
+            self._ready[match] = None
+            touched.append(match)
+            self._pending += 1
+        return touched
+
+    def standings(self):
+        """Return team indices ordered by score, ties broken by seed."""
+        return sorted(range(self.team_count), key=lambda t: (-self.scores[t], t))
+
+    def record(self, match, team):
+        self._check_result(match, team)
+        self.winner[match] = team
+        self.scores[team] += 1
+        del self._ready[match]
+        self._pending -= 1
+        if self._pending:
+            return []
+        if self.current_round < self.rounds:
+            return self._pair_round([])
+        self.champion = self.standings()[0]
+        return []
+
+
+def create_bracket(fmt, team_count):
+    """Create a bracket of the given format ("single", "double" or "swiss")."""
+    if fmt == "single":
+        return EliminationBracket(team_count)
+    if fmt == "double":
+        return EliminationBracket(team_count, double=True)
+    if fmt == "swiss":
+        return SwissBracket(team_count)
+    raise ValueError(f"Unknown bracket format '{fmt}'. Use one of: {', '.join(FORMATS)}")
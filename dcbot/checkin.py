@@ -0,0 +1,66 @@
+"""
+Signed per-team check-in QR codes.
+
+A payload looks like `CHECKIN:<team number>:<signature>`. The signature is
+an HMAC of the team number and team name, so a code only checks in the team
+it was made for and stops working once teams are registered again. Payloads
+only use QR alphanumeric characters, which keeps the codes small.
+
+Codes are rendered to PNG bytes in a process pool so the bot's event loop
+(and its gateway heartbeat) keeps running while hundreds of codes are made.
+"""
+import asyncio
+import base64
+import hashlib
+import hmac
+import io
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+
+import qrcode
+
+PAYLOAD_PREFIX = "CHECKIN"
+
+_executor = None
+
+
+def make_payload(secret, team_number, team_name):
+    """Return the signed check-in payload for a team (team_number is 1-based)."""
+    message = f"{team_number}:{team_name}".encode("utf-8")
+    digest = hmac.new(secret, message, hashlib.sha256).digest()
+    signature = base64.b32encode(digest[:10]).decode("ascii")
+    return f"{PAYLOAD_PREFIX}:{team_number}:{signature}"
+
+
+def payload_team_number(payload):
+    """Return the team number a payload claims to be for, or None if it is malformed."""
+    parts = payload.strip().split(":")
+    if len(parts) != 3 or parts[0] != PAYLOAD_PREFIX or not (parts[1].isascii() and parts[1].isdecimal()):
+        return None
+    return int(parts[1])
+
+
+def verify_payload(secret, payload, team_number, team_name):
+    """Check that a scanned payload was signed for this team."""
+    expected = make_payload(secret, team_number, team_name)
+    return hmac.compare_digest(payload.strip().encode("utf-8"), expected.encode("utf-8"))
+
+
+def render_png(payload):
+    """Render a payload to PNG bytes (runs in a worker process)."""
+    qr = qrcode.QRCode(error_correction=qrcode.constants.ERROR_CORRECT_M, box_size=8, border=4)
+    qr.add_data(payload)
+    qr.make(fit=True)
+    buffer = io.BytesIO()
+    qr.make_image(fill_color="black", back_color="white").save(buffer)
+    return buffer.getvalue()
+
+
+async def render_codes(payloads):
+    """Render payloads to PNG bytes in the worker pool without blocking the event loop."""
+    global _executor
+    if _executor is None:
+        # Forking the threaded bot process can deadlock the children, so workers are spawned fresh
+        _executor = ProcessPoolExecutor(mp_context=multiprocessing.get_context("spawn"))
+    loop = asyncio.get_running_loop()
+    return await asyncio.gather(*(loop.run_in_executor(_executor, render_png, payload) for payload in payloads))
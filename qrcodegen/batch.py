@@ -0,0 +1,188 @@
+"""
+Bulk QR generation: read payloads from a CSV file or stdin, render them
+across a process pool and write each image as soon as it is finished.
+
+Output goes to a directory or to a single .zip/.tar archive. With
+`resume=True` codes that already exist in the output are skipped, so an
+interrupted batch can be restarted with the same command. Directory
+output survives a hard kill; archives are only closed properly on a clean
+exit or Ctrl-C, so a killed process leaves an archive that cannot be resumed.
+Payloads that do not fit in a QR code are logged and skipped.
+"""
+import csv
+import io
+import os
+import re
+import sys
+import tarfile
+import time
+import zipfile
+from multiprocessing import Pool
+
+from qrcode.exceptions import DataOverflowError
+
+from generate import render
+
+PROGRESS_EVERY = 1000
+
+
+def read_jobs(source, csv_input=False):
+    """
+    Read (name, payload) pairs from an open text file.
+    CSV input needs a `payload` column and may have a `name` column;
+    otherwise every non-empty line is one payload. Unnamed codes are
+    numbered by their position in the input. Names that clash after
+    sanitizing get a -2, -3, ... suffix in input order.
+    """
+    jobs = []
+    if csv_input:
+        reader = csv.DictReader(source)
+        if not reader.fieldnames or "payload" not in reader.fieldnames:
+            raise ValueError("CSV input needs a 'payload' column")
+        rows = ((row.get("name"), row["payload"]) for row in reader)
+    else:
+        rows = ((None, line.rstrip("\r\n")) for line in source)
+
+    # Compared case-insensitively so names stay unique on any filesystem
+    taken = set()
+    for index, (name, payload) in enumerate(rows, 1):
+        if not payload:
+            continue
+        base = safe_name(name) if name else f"{index:06d}"
+        name = base
+        suffix = 2
+        while name.lower() in taken:
+            name = f"{base}-{suffix}"
+            suffix += 1
+        taken.add(name.lower())
+        jobs.append((name, payload))
+    return jobs
+
+
+def safe_name(name):
+    """Turn a user supplied name into a safe file name."""
+    return re.sub(r"[^A-Za-z0-9._-]+", "_", name.strip()).strip("._") or "code"
+
+
+class DirectoryWriter:
+    def __init__(self, path, resume):
+        self.path = path
+        os.makedirs(path, exist_ok=True)
+        self.existing = set(os.listdir(path)) if resume else set()
+
+    def write(self, filename, data):
+        # Write to a temporary file first so a killed run never leaves a
+        # half-written image that a resumed run would treat as done
+        target = os.path.join(self.path, filename)
+        with open(target + ".part", "wb") as f:
+            f.write(data)
+        os.replace(target + ".part", target)
+
+    def close(self):
+        pass
+
+
+class ZipWriter:
+    def __init__(self, path, resume):
+        append = resume and os.path.exists(path)
+        # Append mode would silently start a second archive after a damaged one
+        if append and not zipfile.is_zipfile(path):
+            raise ValueError(f"{path} is damaged (the previous run was killed); "
+                             "only directory output can be resumed after a hard kill")
+        self.archive = zipfile.ZipFile(path, "a" if append else "w")
+        self.existing = set(self.archive.namelist())
+
+    def write(self, filename, data):
+        # PNG data is already deflated, so only SVG is worth compressing
+        compression = zipfile.ZIP_STORED if filename.endswith(".png") else zipfile.ZIP_DEFLATED
+        self.archive.writestr(filename, data, compress_type=compression)
+
+    def close(self):
+        self.archive.close()
+
+
+class TarWriter:
+    def __init__(self, path, resume):
+        append = resume and os.path.exists(path)
+        try:
+            self.archive = tarfile.open(path, "a" if append else "w")
+        except tarfile.ReadError:
+            raise ValueError(f"{path} is damaged (the previous run was killed); "
+                             "only directory output can be resumed after a hard kill")
+        self.existing = set(self.archive.getnames())
+
+    def write(self, filename, data):
+        info = tarfile.TarInfo(filename)
+        info.size = len(data)
+        info.mtime = int(time.time())
+        self.archive.addfile(info, io.BytesIO(data))
+
+    def close(self):
+        self.archive.close()
+
+
+def open_writer(path, resume=False):
+    """Pick the output writer from the output path's extension."""
+    if path.endswith(".zip"):
+        return ZipWriter(path, resume)
+    if path.endswith(".tar"):
+        return TarWriter(path, resume)
+    return DirectoryWriter(path, resume)
+
+
+def _render_job(job):
+    """Return (filename, payload, image bytes or None, error message or None)."""
+    filename, payload, options = job
+    try:
+        return filename, payload, render(payload, options), None
+    except (DataOverflowError, ValueError):
+        # Newer qrcode releases raise ValueError when no version fits
+        return filename, payload, None, "payload does not fit in a QR code"
+
+
+def run_batch(jobs, output, options, workers=None, resume=False, log=sys.stderr):
+    """
+    Render every (name, payload) job into `output`.
+    Jobs that fail are logged and skipped, so one bad payload does not
+    stop the batch. Returns the number of codes generated in this run.
+    """
+    workers = workers or os.cpu_count() or 1
+    writer = open_writer(output, resume)
+    pending = []
+    for name, payload in jobs:
+        filename = f"{name}.{options.format}"
+        if filename not in writer.existing:
+            pending.append((filename, payload, options))
+
+    skipped = len(jobs) - len(pending)
+    if skipped:
+        print(f"Resuming: {skipped} code(s) already in {output}", file=log)
+
+    done = 0
+    failed = 0
+    start = time.perf_counter()
+    # Closing the writer on interrupt keeps archives readable for --resume
+    try:
+        if pending:
+            # Chunks amortise pickling while keeping every worker busy
+            chunksize = max(1, min(64, len(pending) // (workers * 4)))
+            with Pool(processes=workers) as pool:
+                for filename, payload, data, error in pool.imap_unordered(_render_job, pending, chunksize):
+                    if error:
+                        failed += 1
+                        preview = payload if len(payload) <= 60 else f"{payload[:60]}... ({len(payload)} chars)"
+                        print(f"Skipped {filename}: {error} ({preview!r})", file=log)
+                        continue
+                    writer.write(filename, data)
+                    done += 1
+                    if done % PROGRESS_EVERY == 0:
+                        elapsed = time.perf_counter() - start
+                        print(f"{done}/{len(pending)} codes ({done / elapsed:.0f} codes/s)", file=log)
+    finally:
+        writer.close()
+
+    elapsed = time.perf_counter() - start
+    rate = done / elapsed if elapsed > 0 else 0.0
+    print(f"Generated {done} code(s), {failed} failed, in {elapsed:.2f}s ({rate:.0f} codes/s) "
+          f"with {workers} worker(s)", file=log)
+    return done
@@ -0,0 +1,62 @@
+"""
+Benchmark optimal-segmentation encoding against the library's version search.
+Both sides start at version 1 with error level L, like main.py.
+
+Usage: python bench_encoding.py [repeats]
+"""
+import sys
+import timeit
+
+from encoding import encode, make_qr
+from generate import RenderOptions, build_qr
+
+CORPUS = {
+    "team code": "TEAM-0042:ROUND3:1234567890123456",
+    "check-in": "CHECKIN:17:SBQNCOHPAU4UPM6R",
+    "numeric id": "00420017202610190001",
+    "badge": "BADGE 000123 GRP4 TABLE 12 SEAT 3",
+    "url": "https://www.makeavltree.codes",
+    "url + id": "https://www.makeavltree.codes/checkin?team=000000000000420017",
+    "mixed": "ORDER 8817-2290 qty=12 ref 99887766554433221100",
+    "long numeric": "9" * 300,
+    "long upper": "TOURNAMENT GROUP STAGE RESULTS " * 8,
+    "unicode": "Équipe Δ 42 ✓ 0000123456789",
+}
+
+
+def best_time(func, repeats):
+    number = 3
+    return min(timeit.repeat(func, number=number, repeat=repeats)) / number
+
+
+def modules(version):
+    return 17 + 4 * version
+
+
+def main():
+    repeats = int(sys.argv[1]) if len(sys.argv) > 1 else 5
+    options = RenderOptions()
+
+    print(f"{'payload':<14} {'library':>12} {'optimal':>14} {'saved':>9} {'lib ms':>8} {'opt ms':>8}")
+    total_library = total_optimal = 0
+    for name, payload in CORPUS.items():
+        library = build_qr(payload, options)
+        chosen = encode(payload)
+
+        library_time = best_time(lambda: build_qr(payload, options), repeats)
+        optimal_time = best_time(lambda: make_qr(encode(payload)), repeats)
+        total_library += modules(library.version) ** 2
+        total_optimal += modules(chosen.version) ** 2
+        print(
+            f"{name:<14} {'v' + str(library.version) + ' L':>12} "
+            f"{'v' + str(chosen.version) + ' ' + chosen.error:>14} "
+            f"{modules(library.version) - modules(chosen.version):>+9d} "
+            f"{library_time * 1e3:>8.2f} {optimal_time * 1e3:>8.2f}"
+        )
+
+    print(f"Total symbol area: {total_library} -> {total_optimal} modules "
+          f"({1 - total_optimal / total_library:.0%} smaller)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,50 @@
+"""
+Benchmark the vectorized renderer against qrcode's make_image path.
+Encoding is done once per case so only rendering is timed.
+
+Usage: python bench_render.py [repeats]
+"""
+import io
+import sys
+import timeit
+from dataclasses import replace
+
+from generate import RenderOptions, build_qr, render_qr
+
+VERSIONS = (1, 5, 10, 20, 40)
+BOX_SIZES = (1, 4, 10, 20)
+
+
+def render_make_image(qr, options):
+    img = qr.make_image(fill_color=options.fill, back_color=options.back)
+    buffer = io.BytesIO()
+    img.save(buffer)
+    return buffer.getvalue()
+
+
+def best_time(func, repeats):
+    number = 5
+    return min(timeit.repeat(func, number=number, repeat=repeats)) / number
+
+
+def main():
+    repeats = int(sys.argv[1]) if len(sys.argv) > 1 else 3
+
+    print(f"{'version':>7} {'box':>4} {'make_image':>11} {'png':>9} {'svg':>9} {'speedup':>8}")
+    for version in VERSIONS:
+        for box_size in BOX_SIZES:
+            options = RenderOptions(version=version, box_size=box_size)
+            qr = build_qr("https://www.makeavltree.codes", options)
+            svg_options = replace(options, format="svg")
+
+            baseline = best_time(lambda: render_make_image(qr, options), repeats)
+            png = best_time(lambda: render_qr(qr, options), repeats)
+            svg = best_time(lambda: render_qr(qr, svg_options), repeats)
+            print(
+                f"{version:>7} {box_size:>4} {baseline * 1e3:>9.2f}ms {png * 1e3:>7.2f}ms "
+                f"{svg * 1e3:>7.2f}ms {baseline / png:>7.1f}x"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,262 @@
+"""
+Benchmark and regression suite for the QR pipeline.
+
+Runs a fixed grid of payload lengths and character classes, all four error
+correction levels, several box sizes and both output formats. Encoding is
+measured once per payload and level (time and peak memory), rendering once
+per box size and format (time, peak memory and output size). Payloads
+are generated from fixed seeds so every run measures the same inputs.
+
+    python bench_suite.py --record     # write the baseline file
+    python bench_suite.py              # compare against it, exit 1 on regressions
+
+Timings depend on the machine, so record the baseline on the machine that
+runs the comparison. Single-case timings are too noisy to gate on, so they
+only produce warnings; a run fails when the geometric mean time regresses,
+or when any case uses more memory or produces larger output.
+"""
+import argparse
+import json
+import platform
+import random
+import string
+import sys
+import timeit
+import tracemalloc
+from dataclasses import replace
+from importlib import metadata
+
+from generate import FORMATS, RenderOptions, build_qr, render_qr
+
+DEFAULT_BASELINE = "bench_baseline.json"
+
+CHAR_CLASSES = {
+    "numeric": string.digits,
+    "alphanumeric": string.digits + string.ascii_uppercase + " $%*+-./:",
+    "byte": string.ascii_lowercase + string.digits + "/:.?=&-_",
+    "unicode": "abcdeé✓Δ漢字 0123",
+}
+LENGTHS = (10, 100, 500)
+LEVELS = ("L", "M", "Q", "H")
+BOX_SIZES = (1, 4, 10)
+
+# section -> metric -> (tolerance option, absolute slack that absorbs timer noise on tiny values)
+METRICS = {
+    "encode": {
+        "encode_ms": ("tolerance", 0.05),
+        "peak_kib": ("memory_tolerance", 1.0),
+    },
+    "render": {
+        "render_ms": ("tolerance", 0.05),
+        "peak_kib": ("memory_tolerance", 1.0),
+        "bytes": ("size_tolerance", 0),
+    },
+}
+# Timing metrics only warn per case; the geometric mean decides pass/fail
+TIMINGS = {"encode_ms", "render_ms"}
+
+
+def make_payload(char_class, length):
+    rng = random.Random(f"{char_class}-{length}")
+    chars = CHAR_CLASSES[char_class]
+    return "".join(rng.choice(chars) for _ in range(length))
+
+
+def best_ms(func, repeats, min_sample=0.01):
+    """Best time per call in ms; fast calls are batched so each sample lasts at least `min_sample` seconds."""
+    timer = timeit.Timer(func)
+    number = max(1, int(min_sample / max(timer.timeit(number=1), 1e-6)))
+    return min(timer.repeat(number=number, repeat=repeats)) / number * 1e3
+
+
+def peak_kib(func):
+    """Peak traced allocation while running `func`, in KiB."""
+    tracemalloc.start()
+    try:
+        func()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return peak / 1024
+
+
+def encode_id(char_class, length, level):
+    return f"{char_class}-{length}-{level}"
+
+
+def render_id(char_class, length, level, box_size, fmt):
+    return f"{encode_id(char_class, length, level)}-box{box_size}-{fmt}"
+
+
+def run_suite(repeats=5, optimize=False, log=sys.stderr):
+    """Measure every case in the grid and return {section: {case id: metrics}}."""
+    results = {"encode": {}, "render": {}}
+    for char_class in CHAR_CLASSES:
+        for length in LENGTHS:
+            payload = make_payload(char_class, length)
+            for level in LEVELS:
+                options = RenderOptions(error=level, optimize=optimize)
+                qr = build_qr(payload, options)
+                # Encoding does not depend on box size or format, so it is its own case
+                results["encode"][encode_id(char_class, length, level)] = {
+                    "version": qr.version,
+                    "encode_ms": round(best_ms(lambda: build_qr(payload, options), repeats), 4),
+                    "peak_kib": round(peak_kib(lambda: build_qr(payload, options)), 1),
+                }
+                for box_size in BOX_SIZES:
+                    for fmt in FORMATS:
+                        case_options = replace(options, box_size=box_size, format=fmt)
+                        results["render"][render_id(char_class, length, level, box_size, fmt)] = {
+                            "render_ms": round(best_ms(lambda: render_qr(qr, case_options), repeats), 4),
+                            "peak_kib": round(peak_kib(lambda: render_qr(qr, case_options)), 1),
+                            "bytes": len(render_qr(qr, case_options)),
+                        }
+            print(f"{char_class}-{length}: done", file=log)
+    return results
+
+
+def environment(repeats, optimize):
+    return {
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "qrcode": metadata.version("qrcode"),
+        "numpy": metadata.version("numpy"),
+        "repeats": repeats,
+        "optimize": optimize,
+    }
+
+
+def compare(results, baseline, tolerances):
+    """Return (failures, timing warnings, missing case ids) of `results` against the baseline sections."""
+    failures = []
+    warnings = []
+    missing = []
+    for section, metrics in METRICS.items():
+        for case, base in baseline[section].items():
+            current = results[section].get(case)
+            if current is None:
+                missing.append(case)
+                continue
+            for metric, (option, slack) in metrics.items():
+                limit = base[metric] * (1 + tolerances[option]) + slack
+                if current[metric] > limit:
+                    message = f"{case}: {metric} {base[metric]} -> {current[metric]} (limit {limit:.4g})"
+                    (warnings if metric in TIMINGS else failures).append(message)
+    return failures, warnings, missing
+
+
+def summarize(results, baseline):
+    """Print and return the geometric mean ratio of every metric against the baseline."""
+    means = {}
+    for section, metrics in METRICS.items():
+        for metric in metrics:
+            ratios = [
+                results[section][case][metric] / base[metric]
+                for case, base in baseline[section].items()
+                if case in results[section] and base[metric] > 0 and results[section][case][metric] > 0
+            ]
+            if ratios:
+                product = 1.0
+                for ratio in ratios:
+                    product *= ratio ** (1 / len(ratios))
+                means[section, metric] = product
+                print(f"{section:>6} {metric:>10}: {product:.3f}x baseline (geometric mean over {len(ratios)} cases)")
+    return means
+
+
+def mean_failures(means, mean_tolerance):
+    return [
+        f"all {section} cases: {metric} geometric mean is {mean:.3f}x baseline"
+        for (section, metric), mean in means.items()
+        if metric in TIMINGS and mean > 1 + mean_tolerance
+    ]
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="QR pipeline benchmark and regression suite")
+    parser.add_argument("--baseline", default=DEFAULT_BASELINE, help="Baseline file to compare against or record")
+    parser.add_argument("--record", action="store_true", help="Write the results as the new baseline")
+    parser.add_argument("--output", help="Also write this run's results to a JSON file")
+    parser.add_argument("--repeats", type=int, default=5, help="Timing repeats per case (best is kept)")
+    parser.add_argument("--optimize", action="store_true", help="Benchmark the optimal-segmentation encoder")
+    parser.add_argument("--tolerance", type=float, default=0.5,
+                        help="Relative slowdown of a single case that is reported as a warning")
+    parser.add_argument("--mean-tolerance", type=float, default=0.15,
+                        help="Allowed relative slowdown of the geometric mean over all cases")
+    parser.add_argument("--memory-tolerance", type=float, default=0.10, help="Allowed relative peak memory growth")
+    parser.add_argument("--retries", type=int, default=2,
+                        help="Times to re-run the timings when a geometric mean is over the limit")
+    parser.add_argument("--size-tolerance", type=float, default=0.0, help="Allowed relative output size growth")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    report = {
+        "environment": environment(args.repeats, args.optimize),
+        **run_suite(args.repeats, args.optimize),
+    }
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2, sort_keys=True)
+
+    cases = len(report["encode"]) + len(report["render"])
+    if args.record:
+        with open(args.baseline, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2, sort_keys=True)
+        print(f"Recorded {cases} cases to {args.baseline}")
+        return 0
+
+    try:
+        with open(args.baseline, encoding="utf-8") as f:
+            baseline = json.load(f)
+    except FileNotFoundError:
+        print(f"No baseline at {args.baseline}. Run with --record first.")
+        return 2
+    if not all(section in baseline for section in METRICS):
+        print(f"Baseline at {args.baseline} uses an old format. Run with --record again.")
+        return 2
+
+    # The two encoders take different paths, so their timings are not comparable
+    if baseline["environment"].get("optimize") != args.optimize:
+        print(f"Error: baseline was recorded with optimize={baseline['environment'].get('optimize')!r}, "
+              f"this run used optimize={args.optimize!r}")
+        return 2
+    for key, value in baseline["environment"].items():
+        if report["environment"].get(key) != value:
+            print(f"Warning: baseline {key} was {value!r}, now {report['environment'].get(key)!r}")
+
+    failures, warnings, missing = compare(report, baseline, vars(args))
+    means = summarize(report, baseline)
+    # A slow run is only a regression if it stays slow when measured again
+    for _ in range(args.retries):
+        if not mean_failures(means, args.mean_tolerance):
+            break
+        print("Geometric mean over the limit, re-running timings", file=sys.stderr)
+        rerun = run_suite(args.repeats, args.optimize)
+        for section, metrics in METRICS.items():
+            for case, current in report[section].items():
+                for metric in TIMINGS.intersection(metrics):
+                    current[metric] = min(current[metric], rerun[section][case][metric])
+        failures, warnings, missing = compare(report, baseline, vars(args))
+        means = summarize(report, baseline)
+    failures += mean_failures(means, args.mean_tolerance)
+
+    if missing:
+        print(f"Warning: {len(missing)} baseline case(s) were not run")
+    if warnings:
+        print(f"{len(warnings)} slow case(s) (not failing on their own):")
+        for warning in warnings:
+            print(f"  {warning}")
+    if failures:
+        print(f"{len(failures)} regression(s):")
+        for failure in failures:
+            print(f"  {failure}")
+        return 1
+    print(f"No regressions across {cases} cases")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,136 @@
+"""
+Content-addressed QR image cache.
+
+Images are keyed by a hash of the payload and every render setting, so a
+key always names the same bytes. Rendered images live on disk under a
+size cap with least-recently-used eviction; a small in-memory tier keeps
+the hottest images so repeat lookups skip the disk as well.
+"""
+import hashlib
+import json
+import os
+import re
+import threading
+from collections import OrderedDict
+from dataclasses import asdict
+
+from generate import render
+
+# Only files with these names are managed (indexed, evicted or cleaned up),
+# so pointing the cache at a directory with other files is safe
+KEY_PATTERN = re.compile(r"[0-9a-f]{64}")
+PART_PATTERN = re.compile(r"[0-9a-f]{64}\.\d+\.part")
+
+
+def cache_key(data, options):
+    """Return the hex key for `data` rendered with `options`."""
+    fields = json.dumps(asdict(options), sort_keys=True, separators=(",", ":"))
+    digest = hashlib.sha256()
+    digest.update(fields.encode("utf-8"))
+    digest.update(b"\0")
+    digest.update(data.encode("utf-8"))
+    return digest.hexdigest()
+
+
+class QRCache:
+    def __init__(self, directory, max_bytes=256 * 1024 * 1024, memory_bytes=16 * 1024 * 1024):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.memory_bytes = memory_bytes
+        self._lock = threading.Lock()
+        self._memory = OrderedDict()  # key -> image bytes, least recent first
+        self._memory_size = 0
+        self._index = OrderedDict()  # key -> size on disk, least recent first
+        self._disk_size = 0
+        os.makedirs(directory, exist_ok=True)
+        self._load_index()
+
+    def _path(self, key):
+        return os.path.join(self.directory, key)
+
+    def _load_index(self):
+        # Recency survives restarts through the files' modification times
+        entries = []
+        for entry in os.scandir(self.directory):
+            if not entry.is_file(follow_symlinks=False):
+                continue
+            if PART_PATTERN.fullmatch(entry.name):
+                # Left over from a put() that was interrupted
+                os.remove(entry.path)
+            elif KEY_PATTERN.fullmatch(entry.name):
+                stat = entry.stat()
+                entries.append((stat.st_mtime, entry.name, stat.st_size))
+        for _, name, size in sorted(entries):
+            self._index[name] = size
+            self._disk_size += size
+
+    def _remember(self, key, data):
+        if len(data) > self.memory_bytes:
+            return
+        if key in self._memory:
+            self._memory.move_to_end(key)
+            return
+        self._memory[key] = data
+        self._memory_size += len(data)
+        while self._memory_size > self.memory_bytes:
+            _, evicted = self._memory.popitem(last=False)
+            self._memory_size -= len(evicted)
+
+    def get(self, key):
+        """Return the cached image for `key`, or None."""
+        with self._lock:
+            data = self._memory.get(key)
+            if data is not None:
+                self._memory.move_to_end(key)
+                if key in self._index:
+                    self._index.move_to_end(key)
+                return data
+            if key not in self._index:
+                return None
+            self._index.move_to_end(key)
+
+        try:
+            with open(self._path(key), "rb") as f:
+                data = f.read()
+            os.utime(self._path(key))
+        except FileNotFoundError:
+            # Evicted by another thread between the index check and the read
+            return None
+
+        with self._lock:
+            self._remember(key, data)
+        return data
+
+    def put(self, key, data):
+        """Store an image, evicting the least recently used ones past the size cap."""
+        path = self._path(key)
+        # Unique temporary name so concurrent renders of one key don't collide
+        temp = f"{path}.{threading.get_ident()}.part"
+        with open(temp, "wb") as f:
+            f.write(data)
+        os.replace(temp, path)
+
+        evicted = []
+        with self._lock:
+            self._disk_size += len(data) - self._index.pop(key, 0)
+            self._index[key] = len(data)
+            while self._disk_size > self.max_bytes and len(self._index) > 1:
+                old_key, size = self._index.popitem(last=False)
+                self._disk_size -= size
+                evicted.append(old_key)
+            self._remember(key, data)
+
+        for old_key in evicted:
+            try:
+                os.remove(self._path(old_key))
+            except FileNotFoundError:
+                pass
+
+    def get_or_render(self, data, options):
+        """Return (key, image bytes), rendering and storing the image on a miss."""
+        key = cache_key(data, options)
+        image = self.get(key)
+        if image is None:
+            image = render(data, options)
+            self.put(key, image)
+        return key, image
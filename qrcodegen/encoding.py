@@ -0,0 +1,157 @@
+"""
+Optimal-segmentation QR encoding.
+
+The payload is split into numeric, alphanumeric and byte segments so the
+encoded bit length is minimal (dynamic programming over the characters,
+once per character-count-width group of versions). The smallest version
+whose capacity fits the bits and the highest error-correction level that
+still fits that version are then read from capacity tables built once at
+import, with no trial encodes.
+"""
+from dataclasses import dataclass
+
+import qrcode
+from qrcode import base, util
+from qrcode.constants import ERROR_CORRECT_H, ERROR_CORRECT_L, ERROR_CORRECT_M, ERROR_CORRECT_Q
+
+ERROR_LEVELS = {
+    "L": ERROR_CORRECT_L,
+    "M": ERROR_CORRECT_M,
+    "Q": ERROR_CORRECT_Q,
+    "H": ERROR_CORRECT_H,
+}
+
+NUMERIC, ALPHANUMERIC, BYTE = "numeric", "alphanumeric", "byte"
+MODES = (NUMERIC, ALPHANUMERIC, BYTE)
+QR_MODES = {NUMERIC: util.MODE_NUMBER, ALPHANUMERIC: util.MODE_ALPHA_NUM, BYTE: util.MODE_8BIT_BYTE}
+ALPHANUMERIC_CHARS = frozenset(util.ALPHA_NUM.decode("ascii"))
+
+# Levels from weakest to strongest
+LEVEL_ORDER = ("L", "M", "Q", "H")
+
+# Versions 1-9, 10-26 and 27-40 use different character count widths
+VERSION_GROUPS = ((1, 9), (10, 26), (27, 40))
+COUNT_BITS = (
+    {NUMERIC: 10, ALPHANUMERIC: 9, BYTE: 8},
+    {NUMERIC: 12, ALPHANUMERIC: 11, BYTE: 16},
+    {NUMERIC: 14, ALPHANUMERIC: 13, BYTE: 16},
+)
+
+# Data capacity in bits for every level and version (index 0 unused)
+CAPACITY_BITS = {
+    level: [0] + [
+        8 * sum(block.data_count for block in base.rs_blocks(version, ERROR_LEVELS[level]))
+        for version in range(1, 41)
+    ]
+    for level in LEVEL_ORDER
+}
+
+
+@dataclass(frozen=True)
+class Encoding:
+    version: int
+    error: str
+    segments: tuple  # (mode, text) pairs
+    bits: int
+
+
+def _char_modes(text, count_bits):
+    """
+    Pick the mode of every character so the total bit length is minimal.
+    Costs are kept in sixths of a bit so numeric (10/3) and alphanumeric
+    (11/2) characters stay integral; a segment switch rounds up to whole bits.
+    """
+    head_costs = {mode: (4 + count_bits[mode]) * 6 for mode in MODES}
+    prev_costs = dict(head_costs)
+    choices = []  # Per character: mode the encoder is in -> mode of this character
+
+    for char in text:
+        cur_costs = {BYTE: prev_costs[BYTE] + len(char.encode("utf-8")) * 48}
+        char_modes = {BYTE: BYTE}
+        if char in ALPHANUMERIC_CHARS:
+            cur_costs[ALPHANUMERIC] = prev_costs[ALPHANUMERIC] + 33
+            char_modes[ALPHANUMERIC] = ALPHANUMERIC
+        if char.isdigit() and char.isascii():
+            cur_costs[NUMERIC] = prev_costs[NUMERIC] + 20
+            char_modes[NUMERIC] = NUMERIC
+
+        # Ending the current segment here and starting one in another mode
+        ended = {mode: (cost + 5) // 6 * 6 for mode, cost in cur_costs.items()}
+        for new_mode in MODES:
+            for old_mode, cost in ended.items():
+                switch_cost = cost + head_costs[new_mode]
+                if new_mode not in cur_costs or switch_cost < cur_costs[new_mode]:
+                    cur_costs[new_mode] = switch_cost
+                    char_modes[new_mode] = old_mode
+        choices.append(char_modes)
+        prev_costs = cur_costs
+
+    modes = [None] * len(text)
+    mode = min(prev_costs, key=prev_costs.get)
+    for index in range(len(text) - 1, -1, -1):
+        mode = choices[index][mode]
+        modes[index] = mode
+    return modes
+
+
+def segment_bits(mode, text, count_bits):
+    """Exact bit length of one segment, including its mode and count header."""
+    length = len(text)
+    if mode == NUMERIC:
+        data = 10 * (length // 3) + (0, 4, 7)[length % 3]
+    elif mode == ALPHANUMERIC:
+        data = 11 * (length // 2) + 6 * (length % 2)
+    else:
+        length = len(text.encode("utf-8"))
+        data = 8 * length
+    return 4 + count_bits[mode] + data
+
+
+def segment(text, group=0):
+    """Split `text` into optimal (mode, text) segments for a version group."""
+    if not text:
+        return ()
+    count_bits = COUNT_BITS[group]
+    modes = _char_modes(text, count_bits)
+    segments = []
+    start = 0
+    for index in range(1, len(text) + 1):
+        if index == len(text) or modes[index] != modes[start]:
+            segments.append((modes[start], text[start:index]))
+            start = index
+    return tuple(segments)
+
+
+def encode(text, min_version=1, min_error="L"):
+    """
+    Choose segments, the smallest version and the highest affordable
+    error-correction level (never below `min_error`) for `text`.
+    """
+    min_rank = LEVEL_ORDER.index(min_error)
+    for group, (first, last) in enumerate(VERSION_GROUPS):
+        if last < min_version:
+            continue
+        segments = segment(text, group)
+        bits = sum(segment_bits(mode, part, COUNT_BITS[group]) for mode, part in segments)
+        capacity = CAPACITY_BITS[min_error]
+        for version in range(max(first, min_version), last + 1):
+            if bits <= capacity[version]:
+                levels = LEVEL_ORDER[min_rank:]
+                error = next(level for level in reversed(levels) if bits <= CAPACITY_BITS[level][version])
+                return Encoding(version, error, segments, bits)
+    raise ValueError(f"Payload does not fit in a QR code at error level {min_error}")
+
+
+def make_qr(encoding, box_size=10, border=4):
+    """Build a QRCode from a chosen encoding without searching versions again."""
+    qr = qrcode.QRCode(
+        version=encoding.version,
+        error_correction=ERROR_LEVELS[encoding.error],
+        box_size=box_size,
+        border=border,
+    )
+    for mode, part in encoding.segments:
+        data = part.encode("utf-8")
+        qr.add_data(util.QRData(data, mode=QR_MODES[mode], check_data=False))
+    qr.make(fit=False)
+    return qr
@@ -0,0 +1,49 @@
+"""QR code building and rendering shared by the single and batch modes."""
+from dataclasses import dataclass
+
+import qrcode
+
+from encoding import ERROR_LEVELS, encode, make_qr
+from render import encode_png, encode_svg, module_array
+
+FORMATS = ("png", "svg")
+
+
+@dataclass(frozen=True)
+class RenderOptions:
+    """Every setting that affects the rendered image."""
+    version: int = 1
+    error: str = "L"
+    box_size: int = 10
+    border: int = 4
+    fill: str = "black"
+    back: str = "white"
+    format: str = "png"
+    optimize: bool = False  # Optimal segments; version and error become minimums
+
+
+def build_qr(data, options):
+    """Encode `data` into a QRCode, growing past `options.version` if needed."""
+    if options.optimize:
+        return make_qr(encode(data, options.version, options.error), options.box_size, options.border)
+    qr = qrcode.QRCode(
+        version=options.version,
+        error_correction=ERROR_LEVELS[options.error],
+        box_size=options.box_size,
+        border=options.border,
+    )
+    qr.add_data(data)
+    qr.make(fit=True)
+    return qr
+
+
+def render_qr(qr, options):
+    """Render an encoded QRCode to PNG or SVG bytes with the vectorized backend."""
+    modules = module_array(qr, options.border)
+    encoder = encode_svg if options.format == "svg" else encode_png
+    return encoder(modules, options.box_size, options.fill, options.back)
+
+
+def render(data, options):
+    """Render `data` to image bytes in `options.format`."""
+    return render_qr(build_qr(data, options), options)
@@ -1,7 +1,75 @@
-import qrcode
-qr = qrcode.QRCode(version=1, error_correction=qrcode.constants.ERROR_CORRECT_L, box_size=10, border=4)
-qr.add_data("https://www.makeavltree.codes")
-qr.make(fit=True)
-img=qr.make_image(fill_color="black", back_color="white")
-img.save("qrcode.png")
-print("QR code generated successfully")
\ No newline at end of file
+import argparse
+import sys
+
+from generate import ERROR_LEVELS, FORMATS, RenderOptions, render
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Generate QR codes")
+    parser.add_argument("data", nargs="?", default="https://www.makeavltree.codes",
+                        help="Payload for a single code")
+    parser.add_argument("-o", "--output",
+                        help="Output file (single) or directory/.zip/.tar (batch)")
+    parser.add_argument("--batch", metavar="INPUT",
+                        help="Generate one code per payload from INPUT ('-' for stdin)")
+    parser.add_argument("--csv", action="store_true",
+                        help="Parse batch input as CSV with 'payload' and optional 'name' columns "
+                             "(implied for .csv files)")
+    parser.add_argument("--workers", type=int, help="Worker processes (default: CPU count)")
+    parser.add_argument("--resume", action="store_true",
+                        help="Skip codes that already exist in the batch output")
+    parser.add_argument("--version", type=int, default=1, help="Smallest QR version to use")
+    parser.add_argument("--error", choices=sorted(ERROR_LEVELS), default="L", help="Error correction level")
+    parser.add_argument("--box-size", type=int, default=10, help="Pixels per module")
+    parser.add_argument("--border", type=int, default=4, help="Quiet zone width in modules")
+    parser.add_argument("--fill", default="black", help="Module color")
+    parser.add_argument("--back", default="white", help="Background color")
+    parser.add_argument("--format", choices=FORMATS, default="png", help="Image format")
+    parser.add_argument("--optimize", action="store_true",
+                        help="Use optimal segments, the smallest version and the highest error "
+                             "correction that fits (--version and --error become minimums)")
+    parser.add_argument("--cache-dir", help="Reuse images from this content-addressed cache instead of re-encoding")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    options = RenderOptions(
+        version=args.version,
+        error=args.error,
+        box_size=args.box_size,
+        border=args.border,
+        fill=args.fill,
+        back=args.back,
+        format=args.format,
+        optimize=args.optimize,
+    )
+
+    if args.batch:
+        from batch import read_jobs, run_batch
+
+        csv_input = args.csv or args.batch.endswith(".csv")
+        try:
+            if args.batch == "-":
+                jobs = read_jobs(sys.stdin, csv_input)
+            else:
+                with open(args.batch, newline="", encoding="utf-8") as source:
+                    jobs = read_jobs(source, csv_input)
+            run_batch(jobs, args.output or "qrcodes", options, workers=args.workers, resume=args.resume)
+        except ValueError as e:
+            sys.exit(f"Error: {e}")
+        return
+
+    if args.cache_dir:
+        from cache import QRCache
+
+        _, image = QRCache(args.cache_dir).get_or_render(args.data, options)
+    else:
+        image = render(args.data, options)
+    with open(args.output or f"qrcode.{args.format}", "wb") as f:
+        f.write(image)
+    print("QR code generated successfully")
+
+
+if __name__ == "__main__":
+    main()
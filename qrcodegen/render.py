@@ -0,0 +1,86 @@
+"""
+Vectorized QR rendering backend.
+
+Works from the module matrix instead of drawing every module through PIL:
+the border is added and the matrix upscaled with NumPy, then encoded
+straight to a 1-bit PNG. SVG output merges each horizontal run of dark
+modules into a single path segment.
+"""
+import struct
+import zlib
+from xml.sax.saxutils import quoteattr
+
+import numpy as np
+from PIL import ImageColor
+
+PNG_SIGNATURE = b"\x89PNG\r\n\x1a\n"
+
+
+def module_array(qr, border):
+    """Return the QR modules as a boolean array (True = dark) with `border` light modules around it."""
+    saved_border = qr.border
+    qr.border = 0
+    try:
+        modules = np.array(qr.get_matrix(), dtype=bool)
+    finally:
+        qr.border = saved_border
+    return np.pad(modules, border, constant_values=False)
+
+
+def _chunk(kind, data):
+    return struct.pack(">I", len(data)) + kind + data + struct.pack(">I", zlib.crc32(kind + data))
+
+
+def encode_png(modules, box_size, fill="black", back="white"):
+    """
+    Encode a module array as a 1-bit PNG.
+    Black on white is written as grayscale like PIL does; any other colors
+    use a two entry palette so the image stays 1 bit per pixel.
+    """
+    fill_rgb = ImageColor.getrgb(fill)[:3]
+    back_rgb = ImageColor.getrgb(back)[:3]
+    grayscale = fill_rgb == (0, 0, 0) and back_rgb == (255, 255, 255)
+
+    # Pack one upscaled scanline per module row. The other box_size - 1
+    # scanlines of the row use the "Up" filter, which makes them all zero
+    row_pixels = modules.repeat(box_size, axis=1)
+    if grayscale:
+        row_pixels = ~row_pixels  # Bit 1 is white in 1-bit grayscale
+    packed = np.packbits(row_pixels, axis=1)
+    rows = np.zeros((packed.shape[0], box_size, packed.shape[1] + 1), dtype=np.uint8)
+    rows[:, 0, 1:] = packed  # Filter type 0 ("None")
+    rows[:, 1:, 0] = 2  # Filter type 2 ("Up")
+    raw = rows.tobytes()
+
+    height, width = modules.shape[0] * box_size, modules.shape[1] * box_size
+    color_type = 0 if grayscale else 3
+    header = struct.pack(">IIBBBBB", width, height, 1, color_type, 0, 0, 0)
+    chunks = [PNG_SIGNATURE, _chunk(b"IHDR", header)]
+    if not grayscale:
+        # Palette index 0 = background, 1 = module
+        chunks.append(_chunk(b"PLTE", bytes(back_rgb + fill_rgb)))
+    chunks.append(_chunk(b"IDAT", zlib.compress(raw, 6)))
+    chunks.append(_chunk(b"IEND", b""))
+    return b"".join(chunks)
+
+
+def encode_svg(modules, box_size, fill="black", back="white"):
+    """Encode a module array as SVG, one path segment per horizontal run of dark modules."""
+    height, width = modules.shape
+    # Run starts/ends are the sign changes of each row padded with light modules
+    padded = np.zeros((height, width + 2), dtype=np.int8)
+    padded[:, 1:-1] = modules
+    edges = np.diff(padded, axis=1)
+    start_rows, start_cols = np.nonzero(edges == 1)
+    end_cols = np.nonzero(edges == -1)[1]
+
+    path = "".join(
+        f"M{x} {y}h{length}v1h-{length}z"
+        for y, x, length in zip(start_rows.tolist(), start_cols.tolist(), (end_cols - start_cols).tolist())
+    )
+    return (
+        f'<svg xmlns="http://www.w3.org/2000/svg" viewBox="0 0 {width} {height}" '
+        f'width="{width * box_size}" height="{height * box_size}" shape-rendering="crispEdges">'
+        f'<rect width="100%" height="100%" fill={quoteattr(back)}/>'
+        f'<path fill={quoteattr(fill)} d="{path}"/></svg>'
+    ).encode("utf-8")
@@ -0,0 +1,112 @@
+"""
+Local HTTP service that renders QR codes on demand from the cache.
+
+    GET /qr?data=<payload>&version=1&error=L&box_size=10&border=4&fill=black&back=white&format=png&optimize=0
+
+The ETag is the cache key, so a client that already has the image gets a
+304 without the server touching the cache, and a repeat request for an
+image the cache holds is never re-encoded.
+
+Usage: python serve.py [--host 127.0.0.1] [--port 8080] [--cache-dir .qrcache]
+"""
+import argparse
+import asyncio
+from dataclasses import replace
+
+from aiohttp import web
+from PIL import ImageColor
+from qrcode.exceptions import DataOverflowError
+
+from cache import QRCache, cache_key
+from generate import ERROR_LEVELS, FORMATS, RenderOptions
+
+CONTENT_TYPES = {"png": "image/png", "svg": "image/svg+xml"}
+INT_FIELDS = ("version", "box_size", "border")
+
+
+def parse_options(query):
+    """Build RenderOptions from query parameters, raising ValueError on bad input."""
+    values = {}
+    for field in INT_FIELDS:
+        if field in query:
+            values[field] = int(query[field])
+    for field in ("error", "fill", "back", "format"):
+        if field in query:
+            values[field] = query[field]
+    if "optimize" in query:
+        values["optimize"] = query["optimize"].lower() in ("1", "true", "yes")
+    options = replace(RenderOptions(), **values)
+
+    if not 1 <= options.version <= 40:
+        raise ValueError("version must be between 1 and 40")
+    if not 1 <= options.box_size <= 100:
+        raise ValueError("box_size must be between 1 and 100")
+    if not 0 <= options.border <= 20:
+        raise ValueError("border must be between 0 and 20")
+    if options.error not in ERROR_LEVELS:
+        raise ValueError(f"error must be one of {', '.join(ERROR_LEVELS)}")
+    if options.format not in FORMATS:
+        raise ValueError(f"format must be one of {', '.join(FORMATS)}")
+    # Colors end up inside the SVG markup, so only accept real color values
+    ImageColor.getrgb(options.fill)
+    ImageColor.getrgb(options.back)
+    return options
+
+
+async def handle_qr(request):
+    data = request.query.get("data")
+    if not data:
+        raise web.HTTPBadRequest(text="Missing 'data' parameter")
+    try:
+        options = parse_options(request.query)
+    except ValueError as e:
+        raise web.HTTPBadRequest(text=str(e))
+
+    key = cache_key(data, options)
+    etag = f'"{key}"'
+    headers = {"ETag": etag, "Cache-Control": "public, max-age=31536000, immutable"}
+    if etag in request.headers.get("If-None-Match", ""):
+        return web.Response(status=304, headers=headers)
+
+    cache = request.app["cache"]
+    in_flight = request.app["in_flight"]
+    # Encoding and disk reads run off the event loop; concurrent requests
+    # for the same image share one render
+    task = in_flight.get(key)
+    if task is None:
+        loop = asyncio.get_running_loop()
+        task = asyncio.ensure_future(loop.run_in_executor(None, cache.get_or_render, data, options))
+        in_flight[key] = task
+        task.add_done_callback(lambda _: in_flight.pop(key, None))
+    try:
+        _, image = await asyncio.shield(task)
+    except (DataOverflowError, ValueError):
+        # Newer qrcode releases raise ValueError when no version fits
+        raise web.HTTPBadRequest(text="Payload does not fit in a QR code")
+
+    return web.Response(body=image, content_type=CONTENT_TYPES[options.format], headers=headers)
+
+
+def make_app(cache):
+    app = web.Application()
+    app["cache"] = cache
+    app["in_flight"] = {}
+    app.router.add_get("/qr", handle_qr)
+    return app
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve cached QR codes over HTTP")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8080)
+    parser.add_argument("--cache-dir", default=".qrcache")
+    parser.add_argument("--max-mb", type=int, default=256, help="Disk cache size cap in MB")
+    parser.add_argument("--memory-mb", type=int, default=16, help="In-memory hot tier size in MB")
+    args = parser.parse_args()
+
+    cache = QRCache(args.cache_dir, args.max_mb * 1024 * 1024, args.memory_mb * 1024 * 1024)
+    web.run_app(make_app(cache), host=args.host, port=args.port)
+
+
+if __name__ == "__main__":
+    main()